@@ -0,0 +1,43 @@
+"""Fixtures shared between test modules"""
+import random
+
+import pysam
+import pytest
+
+from tfomics import ReferenceGenome
+
+# Contig lengths are chosen so that peaks run over the contig ends, and over several
+# of the (shrunk) chunks the genome is read in.
+CONTIGS = {"chr1": 1000, "chr2": 345}
+
+
+class SmallChunkGenome(ReferenceGenome):
+    """Reference genome read in small chunks, so that peaks both fall within
+    a single chunk and straddle chunk boundaries"""
+
+    chunk_size = 256
+    cached_chunks = 2
+
+
+@pytest.fixture(scope="module")
+def sequences():
+    """Random mixed case contig sequences"""
+    rng = random.Random(42)
+    return {
+        name: "".join(rng.choice("ACGTacgt") for _ in range(length))
+        for name, length in CONTIGS.items()
+    }
+
+
+@pytest.fixture(scope="module")
+def genome(tmp_path_factory, sequences):
+    """Indexed fasta file holding the contig sequences"""
+    fasta = tmp_path_factory.mktemp("genome") / "genome.fa"
+    with open(fasta, "w") as fasta_file:
+        for name, sequence in sequences.items():
+            fasta_file.write(">{}\n".format(name))
+            for line_start in range(0, len(sequence), 60):
+                fasta_file.write(sequence[line_start : line_start + 60] + "\n")
+    pysam.faidx(str(fasta))
+
+    return SmallChunkGenome(str(fasta))
@@ -0,0 +1,269 @@
+"""Unit tests for the AlleleSeqData helper class"""
+from collections import namedtuple
+
+import pandas as pd
+import pytest
+
+from tfomics import AlleleSeqData, ReferenceGenome
+from tfomics.statistics import allele_seq_effect_size
+
+# get_winning_allele only needs the POS attribute of each location
+Location = namedtuple("Location", ["POS"])
+
+
+@pytest.fixture
+def allele_seq():
+    """AlleleSeqData holding a small in-memory count table"""
+    data = AlleleSeqData.__new__(AlleleSeqData)
+    data.count = pd.DataFrame(
+        {
+            "chrm": ["chr1", "chr1", "chr1", "chr2"],
+            "snppos": [100, 200, 300, 100],
+            "ref": ["A", "C", "G", "T"],
+            "mat_all": ["A", "C", "G", "T"],
+            "pat_all": ["G", "T", "A", "C"],
+            "cA": [10, 0, 5, 0],
+            "cC": [0, 8, 0, 1],
+            "cG": [2, 0, 3, 0],
+            "cT": [0, 1, 0, 9],
+            "winning": ["M", "M", "P", "M"],
+        }
+    ).set_index(["chrm", "snppos"])
+    return data
+
+
+def test_winning_allele_maternal(allele_seq):
+    """The maternal allele wins when it has more reads pooled over all locations"""
+    rows = allele_seq.get_winning_allele("chr1", [Location(100), Location(200)])
+
+    assert list(rows.columns) == ["mat_all", "ref"]
+    assert rows["mat_all"].tolist() == ["A", "C"]
+    assert rows.index.get_level_values("snppos").tolist() == [100, 200]
+
+
+def test_winning_allele_paternal(allele_seq):
+    """The paternal allele wins when it has more reads pooled over all locations"""
+    rows = allele_seq.get_winning_allele("chr1", [Location(300)])
+
+    assert list(rows.columns) == ["pat_all", "ref"]
+    assert rows["pat_all"].tolist() == ["A"]
+
+
+def test_winning_allele_pick_min(allele_seq):
+    """pick_min returns the allele with the fewest pooled reads instead"""
+    rows = allele_seq.get_winning_allele(
+        "chr1", [Location(100), Location(200)], pick_min=True
+    )
+
+    assert list(rows.columns) == ["pat_all", "ref"]
+    assert rows["pat_all"].tolist() == ["G", "T"]
+
+
+def test_winning_allele_missing_location(allele_seq):
+    """If any of the locations isn't in the count table there is no winning allele"""
+    assert allele_seq.get_winning_allele("chr1", [Location(100), Location(150)]) is None
+    assert allele_seq.get_winning_allele("chr3", [Location(100)]) is None
+
+
+COUNTS = """\
+chrm\tsnppos\tref\tmat_gtyp\tpat_gtyp\tc_gtyp\tphase\tmat_all\tpat_all\tcA\tcC\tcG\tcT\twinning\tSymClass\tSymPval\tBindingSite\tcnv
+chr1\t1000\tG\tGG\tTT\tGT\tPHASED\tG\tT\t0\t0\t20\t2\tM\tAsym\t0.001\t0\t0.5
+chr1\t1030\tA\tAA\tGG\tAG\tPHASED\tA\tG\t25\t0\t16\t2\t?\tAsym\t0.002\t0\t0.5
+chr2\t1010\tC\tCC\tTT\tCT\tPHASED\tC\tT\t0\t2\t0\t18\tP\tAsym\t0.015\t0\t0.5
+chr2\t1020\tA\tAA\tTT\tAT\tPHASED\tA\tT\t11\t0\t0\t9\tM\tSym\t0.5\t0\t0.5
+"""
+
+# An FDR table shorter than the usual 28 rows, followed by the summary footer
+FDR = """\
+#sims 5
+pval\tP\tFP\tFDR
+0.0010\t3\t0\t0.0100
+0.0050\t2\t0\t0.0200
+0.0200\t2\t1\t0.0500
+0.0500\t1\t1\t0.1000
+0.1000\t1\t2\t0.2000
+target 0.1
+before 0.1 0.2
+after 0.3 0.4
+done
+"""
+
+
+@pytest.fixture
+def allele_seq_files(tmp_path):
+    """AlleleSeqData read from a small count file and FDR file"""
+    count_file = tmp_path / "counts.txt"
+    fdr_file = tmp_path / "fdr.txt"
+    count_file.write_text(COUNTS)
+    fdr_file.write_text(FDR)
+    return AlleleSeqData("sample", str(count_file), str(fdr_file))
+
+
+def test_read_fdr_summary(allele_seq_files):
+    """The FDR table and its summary footer are read whatever the table length"""
+    assert allele_seq_files.fdr["pval"].tolist() == [0.001, 0.005, 0.02, 0.05, 0.1]
+    assert allele_seq_files.target == "0.1"
+    assert allele_seq_files.before_fdrs == ["0.1", "0.2"]
+    assert allele_seq_files.after_fdrs == ["0.3", "0.4"]
+
+
+@pytest.mark.parametrize(
+    "fdr,pval",
+    [(0.005, 0), (0.01, 0.001), (0.03, 0.005), (0.05, 0.02), (0.15, 0.05), (1, 0.1)],
+)
+def test_get_pval(allele_seq_files, fdr, pval):
+    """get_pval returns the largest p value with an FDR at or below fdr, or 0 if
+    there is none
+    """
+    assert allele_seq_files.get_pval(fdr) == pval
+
+
+def test_get_candidates(allele_seq_files):
+    """Candidates have a small enough p value, and rows without a clear winning
+    allele are dropped
+    """
+    candidates = allele_seq_files.get_candidates(0.05)
+    assert candidates.index.tolist() == [("chr1", 1000), ("chr2", 1010)]
+
+    # The selection is remembered, and gives the same result a second time
+    assert allele_seq_files.get_candidates(0.05).equals(candidates)
+    assert allele_seq_files.get_candidates(0.005).empty
+
+
+def test_allele_seq_effect_size(allele_seq_files):
+    """The count table can be passed straight to allele_seq_effect_size, which
+    returns one row per SNP in the table
+    """
+    effect_sizes = allele_seq_effect_size(allele_seq_files.count.reset_index())
+    assert effect_sizes.index.tolist() == [
+        ("chr1", 1000),
+        ("chr1", 1030),
+        ("chr2", 1010),
+        ("chr2", 1020),
+    ]
+    assert effect_sizes["es"].notna().all()
+
+    candidates = allele_seq_effect_size(
+        allele_seq_files.get_candidates(0.05).reset_index()
+    )
+    assert candidates.index.tolist() == [("chr1", 1000), ("chr2", 1010)]
+
+
+def create_sequences(candidates):
+    """Call the private AlleleSeqData.__create_sequences"""
+    # pylint: disable=protected-access
+    return AlleleSeqData._AlleleSeqData__create_sequences(candidates)
+
+
+def make_candidates(sequences, snps):
+    """Candidate table for SNPs given as (chromosome, position, winning), with the
+    reference allele taken from the sequence and the other allele a different base
+    """
+    rows = []
+    for chromosome, position, winning in snps:
+        ref = sequences[chromosome][position - 1].upper()
+        alt = "ACGT"[("ACGT".index(ref) + 1) % 4]
+        rows.append((chromosome, position, ref, ref, alt, winning))
+    return pd.DataFrame(
+        rows, columns=["chrm", "snppos", "ref", "mat_all", "pat_all", "winning"]
+    ).set_index(["chrm", "snppos"])
+
+
+@pytest.fixture
+def with_genome(monkeypatch, genome):
+    """Use the small test genome as the AlleleSeqData reference genome"""
+    monkeypatch.setattr(AlleleSeqData, "genome", genome, raising=False)
+
+
+def test_create_sequences(with_genome, sequences):
+    """Sequences are the reference peaks with the winning allele at the SNP, near
+    the contig start and end as well as in the middle, and None without a winner
+    """
+    candidates = make_candidates(
+        sequences,
+        [
+            ("chr1", 1, "P"),
+            ("chr1", 50, "M"),
+            ("chr1", 500, "P"),
+            ("chr1", 995, "M"),
+            ("chr2", 340, "P"),
+            ("chr2", 200, "?"),
+        ],
+    )
+    results = create_sequences(candidates)
+
+    for (chromosome, position), row in results.iterrows():
+        start, end = ReferenceGenome.get_peak_coords(position)
+        expected = sequences[chromosome][start:end].upper()
+        snp = min(ReferenceGenome.offset, position - 1)
+
+        if row["winning"] == "?":
+            assert row["sequence"] is None
+            continue
+
+        winning = row["pat_all"] if row["winning"] == "P" else row["mat_all"]
+        assert row["sequence"] == expected[:snp] + winning + expected[snp + 1 :]
+
+
+def test_create_sequences_reference_mismatch(with_genome, sequences):
+    """The reference allele must match the reference genome at the SNP"""
+    candidates = make_candidates(sequences, [("chr1", 50, "P"), ("chr1", 500, "P")])
+    candidates.loc[("chr1", 500), "ref"] = candidates.loc[("chr1", 500), "pat_all"]
+
+    with pytest.raises(AssertionError):
+        create_sequences(candidates)
+
+
+def test_create_sequences_past_contig_end(with_genome, sequences):
+    """A SNP beyond the end of its contig is an error, rather than reading the
+    bases of the next sequence
+    """
+    candidates = make_candidates(sequences, [("chr1", 500, "P")])
+    # chr2 is 345 bases long
+    past_end = pd.DataFrame(
+        {"ref": ["A"], "mat_all": ["A"], "pat_all": ["C"], "winning": ["P"]},
+        index=pd.MultiIndex.from_tuples([("chr2", 400)], names=["chrm", "snppos"]),
+    )
+
+    with pytest.raises(IndexError):
+        create_sequences(pd.concat([past_end, candidates]))
+
+
+def test_get_row(allele_seq_files):
+    """A SNP in the count table is returned as a dictionary of its column values,
+    with categorical columns giving plain values
+    """
+    row = allele_seq_files.get_row("chr1", 1000)
+
+    assert row["ref"] == "G"
+    assert row["mat_all"] == "G"
+    assert row["winning"] == "M"
+    assert row["cG"] == 20
+    assert row["SymPval"] == 0.001
+
+
+def test_get_row_missing(allele_seq_files):
+    """Looking up a SNP that isn't in the count table gives None"""
+    assert allele_seq_files.get_row("chr1", 999) is None
+    assert allele_seq_files.get_row("chr9", 1000) is None
+
+
+def test_get_row_replaced_count(allele_seq_files):
+    """Replacing the count table also replaces the rows get_row returns"""
+    assert allele_seq_files.get_row("chr2", 1020) is not None
+
+    allele_seq_files.count = allele_seq_files.count.drop(("chr2", 1020))
+    assert allele_seq_files.get_row("chr2", 1020) is None
+
+
+def test_get_het_snp(allele_seq_files):
+    """The preferentially bound allele is the maternal or paternal allele according
+    to the winning column, or None if there is no clear winner
+    """
+    assert allele_seq_files.get_het_snp("chr1", 1000) == "G"
+    assert allele_seq_files.get_het_snp("chr2", 1010) == "T"
+    assert allele_seq_files.get_het_snp("chr1", 1030) is None
+
+    assert allele_seq_files.get_het_snp("chr1", 1000, reference_snp="G") == "G"
+    with pytest.raises(AssertionError):
+        allele_seq_files.get_het_snp("chr1", 1000, reference_snp="A")
@@ -1,16 +1,22 @@
 """Tests for the Altschul and Erickson dinucleotide shuffle implementation"""
 import random
-import re
 
+import numpy as np
 import pytest
 
 from tfomics import dinucleotide_shuffle
 
+# Map the ASCII codes for A, C, G and T onto 0-3
+NUCLEOTIDE_CODES = np.zeros(256, dtype=np.intp)
+NUCLEOTIDE_CODES[np.frombuffer(b"ACGT", dtype=np.uint8)] = np.arange(4)
+
 
 def get_all_dinucleotide_pairs(sequence):
-    """Get all the dinucleotide pairs in a string"""
-    captures = re.finditer(r'(?=(\["ACTG"]{2}))', sequence)
-    return [capture.group(1) for capture in captures]
+    """Get a histogram of all the (overlapping) dinucleotide pairs in a string,
+    with the pair XY counted in bin 4 * X + Y
+    """
+    codes = NUCLEOTIDE_CODES[np.frombuffer(sequence.upper().encode(), dtype=np.uint8)]
+    return np.bincount(codes[:-1] * 4 + codes[1:], minlength=16)
 
 
 def test_preserves_pair_frequency():
@@ -22,12 +28,13 @@ def test_preserves_pair_frequency():
         + "AGGTGCTGTGGTGCTCCCAGGTAGCCTAGTGGGATGCAGGAG"
     )
 
-    samples = [dinucleotide_shuffle(sequence) for _ in range(100)]
+    samples = dinucleotide_shuffle(sequence, n=100)
+    assert len(samples) == 100
 
-    sequence_dinucleotides = get_all_dinucleotide_pairs(sequence).sort()
+    sequence_dinucleotides = get_all_dinucleotide_pairs(sequence)
     for sample in samples:
-        sample_dinucleotides = get_all_dinucleotide_pairs(sample).sort()
-        assert sample_dinucleotides == sequence_dinucleotides
+        sample_dinucleotides = get_all_dinucleotide_pairs(sample)
+        assert np.array_equal(sample_dinucleotides, sequence_dinucleotides)
 
 
 def test_error_invalid_nucleotide():
@@ -65,9 +72,23 @@ def test_deterministic_once_seeded():
         + "AGGTGCTGTGGTGCTCCCAGGTAGCCTCGTGGGATGCAGGAG"
     )
 
-    rng = random.Random(42)
-    first_set = [dinucleotide_shuffle(sequence, rng=rng) for _ in range(10)]
+    rng = np.random.default_rng(42)
+    first_set = dinucleotide_shuffle(sequence, rng=rng, n=10)
+
+    rng = np.random.default_rng(42)
+    second_set = dinucleotide_shuffle(sequence, rng=rng, n=10)
+    assert first_set == second_set
+
+
+def test_deterministic_with_python_random():
+    """A seeded random.Random instance is still accepted in place of
+    a numpy Generator, and is deterministic as well.
+    """
+    sequence = (
+        "AGCAGAAGCAGGATACAGGGCAGCTCTGAGGCAAGGTAGGC"
+        + "AGGTGCTGTGGTGCTCCCAGGTAGCCTCGTGGGATGCAGGAG"
+    )
 
-    rng = random.Random(42)
-    second_set = [dinucleotide_shuffle(sequence, rng=rng) for _ in range(10)]
+    first_set = dinucleotide_shuffle(sequence, rng=random.Random(42), n=10)
+    second_set = dinucleotide_shuffle(sequence, rng=random.Random(42), n=10)
     assert first_set == second_set
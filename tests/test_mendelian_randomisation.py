@@ -6,404 +6,428 @@ import numpy as np
 
 # FIXME: these fixtures and the end-to-end test isn't very informative.
 # We should spend some time on better end-to-end tests.
-@pytest.fixture
+@pytest.fixture(scope="module")
 def snps():
     return pd.DataFrame(
         {
-            "rsid": {0: "rs3814316", 1: "rs7622475", 2: "rs8105903"},
-            "ref": {0: "G", 1: "T", 2: "C"},
-            "alt": {0: "A", 1: "C", 2: "A"},
-            "es": {
-                0: -0.3676815447570283,
-                1: 0.8662327873562312,
-                2: -0.8788795836308416,
-            },
-            "es_sterr": {
-                0: 0.0795660627120642,
-                1: 0.0352281703029674,
-                2: 0.0489189501992082,
-            },
+            "rsid": np.array(["rs3814316", "rs7622475", "rs8105903"], dtype=object),
+            "ref": np.array(["G", "T", "C"], dtype=object),
+            "alt": np.array(["A", "C", "A"], dtype=object),
+            "es": np.array(
+                [-0.3676815447570283, 0.8662327873562312, -0.8788795836308416],
+                dtype=np.float64,
+            ),
+            "es_sterr": np.array(
+                [0.0795660627120642, 0.0352281703029674, 0.0489189501992082],
+                dtype=np.float64,
+            ),
         }
     ).reset_index(drop=True)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def gwas():
     return pd.DataFrame(
         {
-            "rsid": {
-                0: "rs7622475",
-                1: "rs7622475",
-                2: "rs7622475",
-                3: "rs7622475",
-                4: "rs8105903",
-                5: "rs8105903",
-                6: "rs8105903",
-                7: "rs8105903",
-                8: "rs3814316",
-                9: "rs3814316",
-                10: "rs3814316",
-                11: "rs3814316",
-            },
-            "allele": {
-                0: "C",
-                1: "C",
-                2: "C",
-                3: "C",
-                4: "A",
-                5: "A",
-                6: "A",
-                7: "A",
-                8: "A",
-                9: "A",
-                10: "A",
-                11: "A",
-            },
-            "iscore": {
-                0: 0.994035,
-                1: 0.994035,
-                2: 0.994035,
-                3: 0.994035,
-                4: 0.983091,
-                5: 0.983091,
-                6: 0.983091,
-                7: 0.983091,
-                8: 0.991887,
-                9: 0.991887,
-                10: 0.991887,
-                11: 0.991887,
-            },
-            "beta": {
-                0: -0.47226,
-                1: -1.1963,
-                2: 14.333,
-                3: -0.45951,
-                4: -0.49113,
-                5: 6.7073,
-                6: -0.29062,
-                7: -0.24232,
-                8: -9.6309,
-                9: 0.52655,
-                10: 0.49062,
-                11: 0.8951600000000001,
-            },
-            "NSE": {
-                0: 0.067366,
-                1: 0.13735999999999998,
-                2: 1.6988,
-                3: 0.06737,
-                4: 0.11014000000000003,
-                5: 1.3594,
-                6: 0.053982,
-                7: 0.053976,
-                8: 1.4164,
-                9: 0.056216,
-                10: 0.05621,
-                11: 0.11478,
-            },
-            "trait": {
-                0: "23108-0.0",
-                1: "23106-0.0",
-                2: "23105-0.0",
-                3: "23107-0.0",
-                4: "23106-0.0",
-                5: "23105-0.0",
-                6: "23108-0.0",
-                7: "23107-0.0",
-                8: "23105-0.0",
-                9: "23108-0.0",
-                10: "23107-0.0",
-                11: "23106-0.0",
-            },
-            "MAF": {
-                0: 0.200793,
-                1: 0.200793,
-                2: 0.200793,
-                3: 0.200793,
-                4: 0.450407,
-                5: 0.450407,
-                6: 0.450407,
-                7: 0.450407,
-                8: 0.369195,
-                9: 0.369195,
-                10: 0.369195,
-                11: 0.369195,
-            },
-            "HWE": {
-                0: 0.4474,
-                1: 0.4474,
-                2: 0.4474,
-                3: 0.4474,
-                4: 0.7424,
-                5: 0.7424,
-                6: 0.7424,
-                7: 0.7424,
-                8: 0.2104,
-                9: 0.2104,
-                10: 0.2104,
-                11: 0.2104,
-            },
+            "rsid": np.array(
+                [
+                    "rs7622475",
+                    "rs7622475",
+                    "rs7622475",
+                    "rs7622475",
+                    "rs8105903",
+                    "rs8105903",
+                    "rs8105903",
+                    "rs8105903",
+                    "rs3814316",
+                    "rs3814316",
+                    "rs3814316",
+                    "rs3814316",
+                ],
+                dtype=object,
+            ),
+            "allele": np.array(
+                ["C", "C", "C", "C", "A", "A", "A", "A", "A", "A", "A", "A"],
+                dtype=object,
+            ),
+            "iscore": np.array(
+                [
+                    0.994035,
+                    0.994035,
+                    0.994035,
+                    0.994035,
+                    0.983091,
+                    0.983091,
+                    0.983091,
+                    0.983091,
+                    0.991887,
+                    0.991887,
+                    0.991887,
+                    0.991887,
+                ],
+                dtype=np.float64,
+            ),
+            "beta": np.array(
+                [
+                    -0.47226,
+                    -1.1963,
+                    14.333,
+                    -0.45951,
+                    -0.49113,
+                    6.7073,
+                    -0.29062,
+                    -0.24232,
+                    -9.6309,
+                    0.52655,
+                    0.49062,
+                    0.8951600000000001,
+                ],
+                dtype=np.float64,
+            ),
+            "NSE": np.array(
+                [
+                    0.067366,
+                    0.13735999999999998,
+                    1.6988,
+                    0.06737,
+                    0.11014000000000003,
+                    1.3594,
+                    0.053982,
+                    0.053976,
+                    1.4164,
+                    0.056216,
+                    0.05621,
+                    0.11478,
+                ],
+                dtype=np.float64,
+            ),
+            "trait": np.array(
+                [
+                    "23108-0.0",
+                    "23106-0.0",
+                    "23105-0.0",
+                    "23107-0.0",
+                    "23106-0.0",
+                    "23105-0.0",
+                    "23108-0.0",
+                    "23107-0.0",
+                    "23105-0.0",
+                    "23108-0.0",
+                    "23107-0.0",
+                    "23106-0.0",
+                ],
+                dtype=object,
+            ),
+            "MAF": np.array(
+                [
+                    0.200793,
+                    0.200793,
+                    0.200793,
+                    0.200793,
+                    0.450407,
+                    0.450407,
+                    0.450407,
+                    0.450407,
+                    0.369195,
+                    0.369195,
+                    0.369195,
+                    0.369195,
+                ],
+                dtype=np.float64,
+            ),
+            "HWE": np.array(
+                [
+                    0.4474,
+                    0.4474,
+                    0.4474,
+                    0.4474,
+                    0.7424,
+                    0.7424,
+                    0.7424,
+                    0.7424,
+                    0.2104,
+                    0.2104,
+                    0.2104,
+                    0.2104,
+                ],
+                dtype=np.float64,
+            ),
         }
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mr_result():
     return pd.DataFrame(
         {
-            "rsid": {
-                0: "rs3814316",
-                1: "rs3814316",
-                2: "rs3814316",
-                3: "rs3814316",
-                4: "rs7622475",
-                5: "rs7622475",
-                6: "rs7622475",
-                7: "rs7622475",
-                8: "rs8105903",
-                9: "rs8105903",
-                10: "rs8105903",
-                11: "rs8105903",
-            },
-            "ref": {
-                0: "G",
-                1: "G",
-                2: "G",
-                3: "G",
-                4: "T",
-                5: "T",
-                6: "T",
-                7: "T",
-                8: "C",
-                9: "C",
-                10: "C",
-                11: "C",
-            },
-            "alt": {
-                0: "A",
-                1: "A",
-                2: "A",
-                3: "A",
-                4: "C",
-                5: "C",
-                6: "C",
-                7: "C",
-                8: "A",
-                9: "A",
-                10: "A",
-                11: "A",
-            },
-            "es": {
-                0: -0.3676815447570283,
-                1: -0.3676815447570283,
-                2: -0.3676815447570283,
-                3: -0.3676815447570283,
-                4: 0.8662327873562312,
-                5: 0.8662327873562312,
-                6: 0.8662327873562312,
-                7: 0.8662327873562312,
-                8: -0.8788795836308416,
-                9: -0.8788795836308416,
-                10: -0.8788795836308416,
-                11: -0.8788795836308416,
-            },
-            "es_sterr": {
-                0: 0.0795660627120642,
-                1: 0.0795660627120642,
-                2: 0.0795660627120642,
-                3: 0.0795660627120642,
-                4: 0.0352281703029674,
-                5: 0.0352281703029674,
-                6: 0.0352281703029674,
-                7: 0.0352281703029674,
-                8: 0.0489189501992082,
-                9: 0.0489189501992082,
-                10: 0.0489189501992082,
-                11: 0.0489189501992082,
-            },
-            "allele": {
-                0: "A",
-                1: "A",
-                2: "A",
-                3: "A",
-                4: "C",
-                5: "C",
-                6: "C",
-                7: "C",
-                8: "A",
-                9: "A",
-                10: "A",
-                11: "A",
-            },
-            "iscore": {
-                0: 0.991887,
-                1: 0.991887,
-                2: 0.991887,
-                3: 0.991887,
-                4: 0.994035,
-                5: 0.994035,
-                6: 0.994035,
-                7: 0.994035,
-                8: 0.983091,
-                9: 0.983091,
-                10: 0.983091,
-                11: 0.983091,
-            },
-            "beta": {
-                0: -9.6309,
-                1: 0.52655,
-                2: 0.49062,
-                3: 0.8951600000000001,
-                4: -0.47226,
-                5: -1.1963,
-                6: 14.333,
-                7: -0.45951,
-                8: -0.49113,
-                9: 6.7073,
-                10: -0.29062,
-                11: -0.24232,
-            },
-            "NSE": {
-                0: 1.4164,
-                1: 0.056216,
-                2: 0.05621,
-                3: 0.11478,
-                4: 0.067366,
-                5: 0.13735999999999998,
-                6: 1.6988,
-                7: 0.06737,
-                8: 0.11014000000000003,
-                9: 1.3594,
-                10: 0.053982,
-                11: 0.053976,
-            },
-            "trait": {
-                0: "23105-0.0",
-                1: "23108-0.0",
-                2: "23107-0.0",
-                3: "23106-0.0",
-                4: "23108-0.0",
-                5: "23106-0.0",
-                6: "23105-0.0",
-                7: "23107-0.0",
-                8: "23106-0.0",
-                9: "23105-0.0",
-                10: "23108-0.0",
-                11: "23107-0.0",
-            },
-            "MAF": {
-                0: 0.369195,
-                1: 0.369195,
-                2: 0.369195,
-                3: 0.369195,
-                4: 0.200793,
-                5: 0.200793,
-                6: 0.200793,
-                7: 0.200793,
-                8: 0.450407,
-                9: 0.450407,
-                10: 0.450407,
-                11: 0.450407,
-            },
-            "HWE": {
-                0: 0.2104,
-                1: 0.2104,
-                2: 0.2104,
-                3: 0.2104,
-                4: 0.4474,
-                5: 0.4474,
-                6: 0.4474,
-                7: 0.4474,
-                8: 0.7424,
-                9: 0.7424,
-                10: 0.7424,
-                11: 0.7424,
-            },
-            "MR total causal effect": {
-                0: 26.193590995610894,
-                1: -1.4320816682489605,
-                2: -1.3343612345955846,
-                3: -2.4346068296453134,
-                4: -0.5451883222307388,
-                5: -1.381037542634635,
-                6: 16.546360527110444,
-                7: -0.5304694150430838,
-                8: 0.5588137546340942,
-                9: -7.631648436172215,
-                10: 0.3306710104692453,
-                11: 0.2757146764052974,
-            },
-            "MR se": {
-                0: 6.85340574323195,
-                1: 0.34556522834616554,
-                2: 0.3267273497771018,
-                3: 0.6123885844616807,
-                4: 0.08086778177952504,
-                5: 0.16822431251270717,
-                6: 2.0733699442809868,
-                7: 0.08071016598670662,
-                8: 0.1291209346499008,
-                9: 1.6040108128959152,
-                10: 0.06411975471957629,
-                11: 0.06330293028608873,
-            },
-            "z score": {
-                0: 3.821981650725737,
-                1: -4.144171782278948,
-                2: -4.08402062302377,
-                3: -3.975591464993508,
-                4: -6.74172470461871,
-                5: -8.209500291643728,
-                6: 7.980418821421891,
-                7: -6.572522910316587,
-                8: 4.327832323621765,
-                9: -4.757853485035974,
-                10: 5.157084769201226,
-                11: 4.355480467637809,
-            },
-            "p value": {
-                0: 0.00013238354251153526,
-                1: 3.410440300095233e-05,
-                2: 4.4263099938862287e-05,
-                3: 7.020455467429789e-05,
-                4: 1.565174356732314e-11,
-                5: 2.2211092625853213e-16,
-                6: 1.4583758922178308e-15,
-                7: 4.94697726749336e-11,
-                8: 1.5058403614300026e-05,
-                9: 1.9566242805186023e-06,
-                10: 2.5082426838562196e-07,
-                11: 1.3277535680564031e-05,
-            },
-            "effect_allele": {
-                0: "alt",
-                1: "alt",
-                2: "alt",
-                3: "alt",
-                4: "alt",
-                5: "alt",
-                6: "alt",
-                7: "alt",
-                8: "alt",
-                9: "alt",
-                10: "alt",
-                11: "alt",
-            },
-            "q values": {
-                0: 0.00013238354251153526,
-                1: 4.54725373346031e-05,
-                2: 5.311571992663474e-05,
-                3: 7.658678691741587e-05,
-                4: 6.260697426929255e-11,
-                5: 2.6653311151023855e-15,
-                6: 8.750255353306986e-15,
-                7: 1.4840931802480083e-10,
-                8: 2.258760542145004e-05,
-                9: 3.913248561037205e-06,
-                10: 6.019782441254927e-07,
-                11: 2.258760542145004e-05,
-            },
-        },
+            "rsid": np.array(
+                [
+                    "rs3814316",
+                    "rs3814316",
+                    "rs3814316",
+                    "rs3814316",
+                    "rs7622475",
+                    "rs7622475",
+                    "rs7622475",
+                    "rs7622475",
+                    "rs8105903",
+                    "rs8105903",
+                    "rs8105903",
+                    "rs8105903",
+                ],
+                dtype=object,
+            ),
+            "ref": np.array(
+                ["G", "G", "G", "G", "T", "T", "T", "T", "C", "C", "C", "C"],
+                dtype=object,
+            ),
+            "alt": np.array(
+                ["A", "A", "A", "A", "C", "C", "C", "C", "A", "A", "A", "A"],
+                dtype=object,
+            ),
+            "es": np.array(
+                [
+                    -0.3676815447570283,
+                    -0.3676815447570283,
+                    -0.3676815447570283,
+                    -0.3676815447570283,
+                    0.8662327873562312,
+                    0.8662327873562312,
+                    0.8662327873562312,
+                    0.8662327873562312,
+                    -0.8788795836308416,
+                    -0.8788795836308416,
+                    -0.8788795836308416,
+                    -0.8788795836308416,
+                ],
+                dtype=np.float64,
+            ),
+            "es_sterr": np.array(
+                [
+                    0.0795660627120642,
+                    0.0795660627120642,
+                    0.0795660627120642,
+                    0.0795660627120642,
+                    0.0352281703029674,
+                    0.0352281703029674,
+                    0.0352281703029674,
+                    0.0352281703029674,
+                    0.0489189501992082,
+                    0.0489189501992082,
+                    0.0489189501992082,
+                    0.0489189501992082,
+                ],
+                dtype=np.float64,
+            ),
+            "allele": np.array(
+                ["A", "A", "A", "A", "C", "C", "C", "C", "A", "A", "A", "A"],
+                dtype=object,
+            ),
+            "iscore": np.array(
+                [
+                    0.991887,
+                    0.991887,
+                    0.991887,
+                    0.991887,
+                    0.994035,
+                    0.994035,
+                    0.994035,
+                    0.994035,
+                    0.983091,
+                    0.983091,
+                    0.983091,
+                    0.983091,
+                ],
+                dtype=np.float64,
+            ),
+            "beta": np.array(
+                [
+                    -9.6309,
+                    0.52655,
+                    0.49062,
+                    0.8951600000000001,
+                    -0.47226,
+                    -1.1963,
+                    14.333,
+                    -0.45951,
+                    -0.49113,
+                    6.7073,
+                    -0.29062,
+                    -0.24232,
+                ],
+                dtype=np.float64,
+            ),
+            "NSE": np.array(
+                [
+                    1.4164,
+                    0.056216,
+                    0.05621,
+                    0.11478,
+                    0.067366,
+                    0.13735999999999998,
+                    1.6988,
+                    0.06737,
+                    0.11014000000000003,
+                    1.3594,
+                    0.053982,
+                    0.053976,
+                ],
+                dtype=np.float64,
+            ),
+            "trait": np.array(
+                [
+                    "23105-0.0",
+                    "23108-0.0",
+                    "23107-0.0",
+                    "23106-0.0",
+                    "23108-0.0",
+                    "23106-0.0",
+                    "23105-0.0",
+                    "23107-0.0",
+                    "23106-0.0",
+                    "23105-0.0",
+                    "23108-0.0",
+                    "23107-0.0",
+                ],
+                dtype=object,
+            ),
+            "MAF": np.array(
+                [
+                    0.369195,
+                    0.369195,
+                    0.369195,
+                    0.369195,
+                    0.200793,
+                    0.200793,
+                    0.200793,
+                    0.200793,
+                    0.450407,
+                    0.450407,
+                    0.450407,
+                    0.450407,
+                ],
+                dtype=np.float64,
+            ),
+            "HWE": np.array(
+                [
+                    0.2104,
+                    0.2104,
+                    0.2104,
+                    0.2104,
+                    0.4474,
+                    0.4474,
+                    0.4474,
+                    0.4474,
+                    0.7424,
+                    0.7424,
+                    0.7424,
+                    0.7424,
+                ],
+                dtype=np.float64,
+            ),
+            "MR total causal effect": np.array(
+                [
+                    26.193590995610894,
+                    -1.4320816682489605,
+                    -1.3343612345955846,
+                    -2.4346068296453134,
+                    -0.5451883222307388,
+                    -1.381037542634635,
+                    16.546360527110444,
+                    -0.5304694150430838,
+                    0.5588137546340942,
+                    -7.631648436172215,
+                    0.3306710104692453,
+                    0.2757146764052974,
+                ],
+                dtype=np.float64,
+            ),
+            "MR se": np.array(
+                [
+                    6.85340574323195,
+                    0.34556522834616554,
+                    0.3267273497771018,
+                    0.6123885844616807,
+                    0.08086778177952504,
+                    0.16822431251270717,
+                    2.0733699442809868,
+                    0.08071016598670662,
+                    0.1291209346499008,
+                    1.6040108128959152,
+                    0.06411975471957629,
+                    0.06330293028608873,
+                ],
+                dtype=np.float64,
+            ),
+            "z score": np.array(
+                [
+                    3.821981650725737,
+                    -4.144171782278948,
+                    -4.08402062302377,
+                    -3.975591464993508,
+                    -6.74172470461871,
+                    -8.209500291643728,
+                    7.980418821421891,
+                    -6.572522910316587,
+                    4.327832323621765,
+                    -4.757853485035974,
+                    5.157084769201226,
+                    4.355480467637809,
+                ],
+                dtype=np.float64,
+            ),
+            "p value": np.array(
+                [
+                    0.00013238354251153526,
+                    3.410440300095233e-05,
+                    4.4263099938862287e-05,
+                    7.020455467429789e-05,
+                    1.565174356732314e-11,
+                    2.2211092625853213e-16,
+                    1.4583758922178308e-15,
+                    4.94697726749336e-11,
+                    1.5058403614300026e-05,
+                    1.9566242805186023e-06,
+                    2.5082426838562196e-07,
+                    1.3277535680564031e-05,
+                ],
+                dtype=np.float64,
+            ),
+            "effect_allele": np.array(
+                [
+                    "alt",
+                    "alt",
+                    "alt",
+                    "alt",
+                    "alt",
+                    "alt",
+                    "alt",
+                    "alt",
+                    "alt",
+                    "alt",
+                    "alt",
+                    "alt",
+                ],
+                dtype=object,
+            ),
+            "q values": np.array(
+                [
+                    0.00013238354251153526,
+                    4.54725373346031e-05,
+                    5.311571992663474e-05,
+                    7.658678691741587e-05,
+                    6.260697426929255e-11,
+                    2.6653311151023855e-15,
+                    8.750255353306986e-15,
+                    1.4840931802480083e-10,
+                    2.258760542145004e-05,
+                    3.913248561037205e-06,
+                    6.019782441254927e-07,
+                    2.258760542145004e-05,
+                ],
+                dtype=np.float64,
+            ),
+        }
     )
 
 
@@ -441,10 +465,43 @@ def test_naive_mr(snps, gwas, mr_result):
     """Run a full end-to-end test of the naive MR analysis"""
     mr_snps = mr.naive_effect_on_trait(snps, gwas, permute=False)
 
-    pd.testing.assert_frame_equal(mr_snps, mr_result)
+    assert list(mr_snps.columns) == list(mr_result.columns)
+    np.testing.assert_array_equal(mr_snps.index, mr_result.index)
+
+    num_cols = [
+        "es",
+        "es_sterr",
+        "beta",
+        "NSE",
+        "MAF",
+        "HWE",
+        "iscore",
+        "MR total causal effect",
+        "MR se",
+        "z score",
+        "p value",
+        "q values",
+    ]
+    obj_cols = [col for col in mr_result.columns if col not in num_cols]
+
+    np.testing.assert_allclose(
+        mr_snps[num_cols].to_numpy(dtype=np.float64),
+        mr_result[num_cols].to_numpy(dtype=np.float64),
+        rtol=1e-10,
+    )
+    assert (mr_snps[obj_cols].to_numpy() == mr_result[obj_cols].to_numpy()).all()
+
+
+def test_naive_mr_permute_leaves_input_untouched(snps, gwas):
+    """A permutation run shuffles the rsids of a copy, not of the caller's dataframe"""
+    gwas_before = gwas.copy()
+    mr_snps = mr.naive_effect_on_trait(snps, gwas, permute=True)
 
+    pd.testing.assert_frame_equal(gwas, gwas_before)
+    assert set(mr_snps.rsid) <= set(snps.rsid)
 
-@pytest.fixture
+
+@pytest.fixture(scope="module")
 def filter_frame():
     return pd.DataFrame(
         {
@@ -457,86 +514,33 @@ def filter_frame():
     )
 
 
-def test_filter_effect_snps_min_maf(filter_frame):
-
-    # if min_MAF < 0.05, both columns should survive
-    filtered = mr.filter_effect_snps(
-        filter_frame, 0.04, 0.04, 0.04, list(filter_frame.trait)
-    )
-    pd.testing.assert_frame_equal(filter_frame, filtered)
-
-    # Should be the same for min_MAF == 0.05
-    filtered = mr.filter_effect_snps(
-        filter_frame, 0.05, 0.04, 0.04, list(filter_frame.trait)
-    )
-    pd.testing.assert_frame_equal(filter_frame, filtered)
-
-    # 1. > min_maf > 0.05 results in one entry, that entry being the low one
-    filtered = mr.filter_effect_snps(
-        filter_frame, 0.25, 0.04, 0.04, list(filter_frame.trait)
-    )
-    pd.testing.assert_frame_equal(filter_frame[filter_frame.id == "high"], filtered)
-
-
-def test_filter_effect_snps_min_hwe(filter_frame):
-    # if min_HWE < 0.05, both columns should survive
-    filtered = mr.filter_effect_snps(
-        filter_frame, 0.04, 0.04, 0.04, list(filter_frame.trait)
-    )
-    pd.testing.assert_frame_equal(filter_frame, filtered)
-
-    # Should be the same for min_HWE == 0.05
-    filtered = mr.filter_effect_snps(
-        filter_frame, 0.04, 0.05, 0.04, list(filter_frame.trait)
-    )
-    pd.testing.assert_frame_equal(filter_frame, filtered)
-
-    # 1. > min_HWE > 0.05 results in one entry, that entry being the low one
-    filtered = mr.filter_effect_snps(
-        filter_frame, 0.04, 0.25, 0.04, list(filter_frame.trait)
-    )
-    pd.testing.assert_frame_equal(filter_frame[filter_frame.id == "high"], filtered)
-
-
-def test_filter_effect_snps_min_iscore(filter_frame):
-    # if min_iscore < 0.05, both columns should survive
-    filtered = mr.filter_effect_snps(
-        filter_frame, 0.04, 0.04, 0.04, list(filter_frame.trait)
-    )
-    pd.testing.assert_frame_equal(filter_frame, filtered)
-
-    # Should be the same for min_iscore == 0.05
-    filtered = mr.filter_effect_snps(
-        filter_frame, 0.04, 0.04, 0.05, list(filter_frame.trait)
-    )
-    pd.testing.assert_frame_equal(filter_frame, filtered)
-
-    # 1. > min_iscore > 0.05 results in one entry, that entry being the low one
-    filtered = mr.filter_effect_snps(
-        filter_frame, 0.04, 0.04, 0.25, list(filter_frame.trait)
-    )
-    pd.testing.assert_frame_equal(filter_frame[filter_frame.id == "high"], filtered)
-
-
-def test_high_filter_empty_result(filter_frame):
-    """Test that a high threshold returns an empty dataframe"""
-    # MAF
-    filtered = mr.filter_effect_snps(
-        filter_frame, 1.2, 0.04, 0.04, list(filter_frame.trait)
-    )
-    assert filtered.empty
-
-    # HWE
-    filtered = mr.filter_effect_snps(
-        filter_frame, 0.04, 1.2, 0.04, list(filter_frame.trait)
-    )
-    assert filtered.empty
-
-    # iscore
+@pytest.mark.parametrize(
+    "min_maf,min_hwe,min_iscore,expected_ids",
+    [
+        # Thresholds below 0.05 let both rows through
+        (0.04, 0.04, 0.04, ["high", "low"]),
+        # Thresholds are inclusive, so 0.05 does too
+        (0.05, 0.04, 0.04, ["high", "low"]),
+        (0.04, 0.05, 0.04, ["high", "low"]),
+        (0.04, 0.04, 0.05, ["high", "low"]),
+        # 1. > threshold > 0.05 only lets the high entry through
+        (0.25, 0.04, 0.04, ["high"]),
+        (0.04, 0.25, 0.04, ["high"]),
+        (0.04, 0.04, 0.25, ["high"]),
+        # A threshold above 1. filters out everything
+        (1.2, 0.04, 0.04, []),
+        (0.04, 1.2, 0.04, []),
+        (0.04, 0.04, 1.2, []),
+    ],
+)
+def test_filter_effect_snps_thresholds(
+    filter_frame, min_maf, min_hwe, min_iscore, expected_ids
+):
+    """Check the MAF, HWE and iscore thresholds, each of which is inclusive"""
     filtered = mr.filter_effect_snps(
-        filter_frame, 0.04, 0.04, 1.2, list(filter_frame.trait)
+        filter_frame, min_maf, min_hwe, min_iscore, list(filter_frame.trait)
     )
-    assert filtered.empty
+    assert list(filtered.id) == expected_ids
 
 
 def test_filter_traits(filter_frame):
@@ -555,7 +559,66 @@ def test_filter_traits(filter_frame):
 
 
 def test_fit_effect_returns_nan_if_wrong_allele():
-    wrong_alleles = pd.Series({"ref": ["A"], "alt": ["T"], "allele": ["C"]})
-    np.testing.assert_array_equal(
-        mr._fit_effects(wrong_alleles).to_numpy(), np.full(5, np.nan)
+    wrong_alleles = pd.DataFrame(
+        {
+            "ref": ["A"],
+            "alt": ["T"],
+            "allele": ["C"],
+            "es": [0.5],
+            "es_sterr": [0.1],
+            "beta": [1.0],
+            "NSE": [0.2],
+        }
+    )
+    assert pd.DataFrame(mr._fit_effects(wrong_alleles)).isna().to_numpy().all()
+
+
+def test_fit_effect_missing_alleles_do_not_match():
+    """A missing GWAS allele doesn't match a missing ref or alt allele"""
+    missing_alleles = pd.DataFrame(
+        {
+            "ref": ["A"],
+            "alt": [np.nan],
+            "allele": [np.nan],
+            "es": [0.5],
+            "es_sterr": [0.1],
+            "beta": [1.0],
+            "NSE": [0.2],
+        }
+    )
+    assert pd.DataFrame(mr._fit_effects(missing_alleles)).isna().to_numpy().all()
+
+
+def test_fit_effect_orients_ref_allele():
+    """Swapping the GWAS allele from alt to ref flips the sign of the causal effect"""
+    alleles = pd.DataFrame(
+        {
+            "ref": ["A", "A"],
+            "alt": ["T", "T"],
+            "allele": ["T", "A"],
+            "es": [0.5, 0.5],
+            "es_sterr": [0.1, 0.1],
+            "beta": [1.0, 1.0],
+            "NSE": [0.2, 0.2],
+        }
+    )
+    effects = pd.DataFrame(mr._fit_effects(alleles))
+    assert effects["effect_allele"].tolist() == ["alt", "ref"]
+    assert effects["MR total causal effect"].tolist() == [2.0, -2.0]
+    assert effects["MR se"].iat[0] == effects["MR se"].iat[1]
+
+
+def test_benjamini_hochberg():
+    """Check q-values against a small hand-calculated example"""
+    q_values = mr._benjamini_hochberg([0.01, 0.04, 0.03, 0.005])
+    np.testing.assert_allclose(q_values, [0.02, 0.04, 0.04, 0.02])
+
+    # q-values are capped at one
+    np.testing.assert_allclose(mr._benjamini_hochberg([0.9, 0.8]), [0.9, 0.9])
+    np.testing.assert_allclose(mr._benjamini_hochberg([1.0, 1.0]), [1.0, 1.0])
+
+    # NaN p-values are ignored, and don't count towards the number of tests
+    np.testing.assert_allclose(
+        mr._benjamini_hochberg([0.01, np.nan, 0.04, 0.03, 0.005]),
+        [0.02, np.nan, 0.04, 0.04, 0.02],
     )
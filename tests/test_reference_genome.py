@@ -0,0 +1,48 @@
+"""Unit tests for the ReferenceGenome helper class"""
+import pytest
+
+from tfomics import ReferenceGenome
+
+
+def test_get_region(genome, sequences):
+    """Regions match slices of the sequence, within and across chunks"""
+    for start, end in [(0, 10), (250, 260), (0, 600), (256, 257), (950, 1200), (5, 5)]:
+        assert (
+            genome.get_region("chr1", start, end)
+            == sequences["chr1"][start:end].upper()
+        )
+
+
+def test_get_region_start_after_end(genome):
+    """Asking for a region that ends before it starts is an error"""
+    with pytest.raises(ValueError):
+        genome.get_region("chr1", 20, 10)
+
+
+def test_get_peaks(genome, sequences):
+    """Batched peaks match single peaks and slices of the sequence, for peaks near
+    the contig start, straddling chunk boundaries and running past the contig end
+    """
+    for reference, sequence in sequences.items():
+        length = len(sequence)
+        # Peaks at 156 and below end within the first chunk, the peak at 157 is
+        # the first to straddle the boundary at 256.
+        positions = [1, 2, 50, 101, 156, 157, 200, 300, 500, 700, 900]
+        positions = [pos for pos in positions if pos <= length] + [length - 10, length]
+        peaks = genome.get_peaks(reference, positions)
+
+        assert peaks == [genome.get_peak(reference, pos) for pos in positions]
+
+        for pos, peak in zip(positions, peaks):
+            start, end = ReferenceGenome.get_peak_coords(pos)
+            assert peak == sequences[reference][start:end].upper()
+
+
+def test_get_peak_expected_base(genome, sequences):
+    """The base at the peak position is checked against the expected base"""
+    for pos in [1, 50, 101, 300]:
+        base = sequences["chr1"][pos - 1].upper()
+        assert genome.get_peak("chr1", pos, expected_base=base)
+
+    with pytest.raises(AssertionError):
+        genome.get_peak("chr1", 300, expected_base="N")
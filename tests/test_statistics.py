@@ -84,6 +84,67 @@ def test_group_reffects():
     assert grouped_results["sterr"].round(4).tolist() == [0.7071, 0.5774]
 
 
+def test_group_categorical_only_observed():
+    """Grouping on categorical columns only returns the groups present in the data,
+    not every combination of categories
+    """
+    data = pd.DataFrame(
+        {
+            "chrm": pd.Categorical(
+                ["chr2", "chr1", "chr1", "chr2"], categories=["chr1", "chr2", "chr3"]
+            ),
+            "snppos": [55, 42, 42, 150],
+            "effect": [1.0, 1.0, 0.0, 0.0],
+            "sterr": [1.0, 1.0, 1.0, 1.0],
+        }
+    )
+    grouped_results = tfomics.statistics.group_statistics(
+        data,
+        param_column="effect",
+        sterr_column="sterr",
+        group_columns=("chrm", "snppos"),
+    )
+    assert grouped_results.index.tolist() == [("chr1", 42), ("chr2", 55), ("chr2", 150)]
+    assert grouped_results["effect"].round(4).tolist() == [0.5, 1.0, 0.0]
+    assert grouped_results["sterr"].round(4).tolist() == [0.7071, 1.0, 1.0]
+
+
+ALLELE_COUNTS = pd.DataFrame(
+    {
+        "ref": ["A", "C", "G"],
+        "mat_all": ["A", "T", "A"],
+        "pat_all": ["G", "C", "T"],
+        "cA": [10, 0, 5],
+        "cC": [1, 7, 0],
+        "cG": [4, 0, 2],
+        "cT": [0, 3, 6],
+    },
+    index=[10, 20, 30],
+)
+
+
+@pytest.mark.parametrize("dtype", [object, "category"])
+def test_ref_and_alt_counts(dtype):
+    """The alternate allele is the paternal allele if the maternal allele is the
+    reference, otherwise the maternal allele, even if neither is the reference
+    """
+    counts = tfomics.statistics.get_ref_and_alt_counts(
+        ALLELE_COUNTS.astype({"ref": dtype, "mat_all": dtype, "pat_all": dtype})
+    )
+    assert counts.index.tolist() == [10, 20, 30]
+    assert counts["ref_count"].tolist() == [10, 7, 2]
+    assert counts["alt_count"].tolist() == [4, 3, 5]
+
+
+@pytest.mark.parametrize("column,row", [("ref", 10), ("mat_all", 20), ("pat_all", 10)])
+def test_ref_and_alt_counts_invalid_allele(column, row):
+    """Reference or alternate alleles other than A, C, G or T are an error"""
+    data_frame = ALLELE_COUNTS.copy()
+    data_frame.loc[row, column] = "N"
+    with pytest.raises(KeyError):
+        tfomics.statistics.get_ref_and_alt_counts(data_frame)
+
+
 def test_allele_seq_missing_columns():
     """We throw an error if we call an allele-seq specific method with a dataframe that doesn't
     have allele-seq's column structure
@@ -1,5 +1,23 @@
 """Helper functions to perform various operations on genome snippets"""
+import importlib
 
 from .dinucleotide_shuffle import dinucleotide_shuffle
-from .data_structures.allele_seq import AlleleSeqData
-from .data_structures.reference_genome import ReferenceGenome
+
+__all__ = ["dinucleotide_shuffle", "AlleleSeqData", "ReferenceGenome"]
+
+# The data structures pull in pandas and pysam, so defer importing them until
+# they are first accessed.
+_LAZY_IMPORTS = {
+    "AlleleSeqData": ".data_structures.allele_seq",
+    "ReferenceGenome": ".data_structures.reference_genome",
+}
+
+
+def __getattr__(name):
+    """Import AlleleSeqData and ReferenceGenome on first access"""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -1,4 +1,5 @@
 """Helper class for processing output from AlleleSeq"""
+import io
 from enum import Enum, unique
 
 import numpy
@@ -10,7 +11,23 @@ from .reference_genome import ReferenceGenome
 class AlleleSeqData:
     """Helper object holding ChIP-seq data for a cell line and associated FDR estimates"""
 
-    _field_separator = r"\s*\t"
+    # Fields are tab separated, with occasional stray whitespace before the tab.
+    # pandas handles a plain r"\s+" separator with its C parser.
+    _field_separator = r"\s+"
+    _nucleotides = "ACGT"
+    _count_columns = ["cA", "cC", "cG", "cT"]
+
+    # Alleles only take a handful of distinct values, so store them as categoricals
+    # rather than one python string per row. Chromosomes are left as strings, since
+    # grouping on a categorical chromosome and the SNP position would produce every
+    # combination of the two rather than just the SNPs in the table.
+    _count_dtypes = {
+        "snppos": numpy.int64,
+        "ref": "category",
+        "mat_all": "category",
+        "pat_all": "category",
+        "winning": "category",
+    }
 
     @unique
     class CountColumns(Enum):
@@ -36,35 +53,32 @@ class AlleleSeqData:
         try:
             self.count = pandas.read_csv(
                 count_file,
-                AlleleSeqData._field_separator,
-                dtype={"snppos": numpy.int64},
-                engine="python",
+                sep=AlleleSeqData._field_separator,
+                dtype=AlleleSeqData._count_dtypes,
+                engine="c",
                 index_col=["chrm", "snppos"],
             )
 
             # The first line is a header comment, the last four lines have summary data.
-            # We skip both of these and read in the summary data separately.
+            # Read the file once, parse the table in between with the C parser and
+            # pick the summary data out of the footer.
+            with open(fdr_file) as file:
+                fdr_lines = file.read().splitlines()
+
             self.fdr = pandas.read_csv(
-                fdr_file,
-                AlleleSeqData._field_separator,
-                skipfooter=4,
-                skiprows=1,
-                engine="python",
+                io.StringIO("\n".join(fdr_lines[1:-4])),
+                sep=AlleleSeqData._field_separator,
+                engine="c",
             )
 
-            with open(fdr_file) as file:
-                # The first 30 lines have been read in above, so ignore them.
-                for _ in range(30):
-                    file.readline()
-
-                for line in file.readlines():
-                    parsed_line = [i for i in filter(None, line.strip().split(" "))]
-                    if parsed_line[0] == "target":
-                        self.target = parsed_line[1]
-                    elif parsed_line[0] == "before":
-                        self.before_fdrs = parsed_line[1:]
-                    elif parsed_line[0] == "after":
-                        self.after_fdrs = parsed_line[1:]
+            summary = {
+                fields[0]: fields[1:]
+                for fields in (line.split() for line in fdr_lines[-4:])
+                if fields
+            }
+            self.target = summary.get("target", [None])[0]
+            self.before_fdrs = summary.get("before")
+            self.after_fdrs = summary.get("after")
 
             count_columns = self.count.columns.values.tolist()
             for column in AlleleSeqData.CountColumns:
@@ -85,15 +99,29 @@ class AlleleSeqData:
             print("{}, did you import the right file?".format(missing_column))
             exit(1)
 
+        # Sort the FDR table once up front, so that finding the largest p value
+        # for a given FDR is a binary search rather than a query.
+        fdr_values = self.fdr[AlleleSeqData.FdrColumns.FDR.value].to_numpy()
+        p_values = self.fdr[AlleleSeqData.FdrColumns.P_VALUE.value].to_numpy()
+        fdr_order = numpy.argsort(fdr_values, kind="stable")
+        self._sorted_fdr = fdr_values[fdr_order]
+        self._max_pval = numpy.fmax.accumulate(p_values[fdr_order])
+
+        # Candidate selections already computed, keyed on FDR
+        self._candidate_masks = {}
+
+        # Built on the first call to get_row
+        self._row_source = None
+        self._row_index = None
+        self._row_columns = None
+
     def get_pval(self, fdr):
         """Find P-value to use when selecting entries to ensure a
         False Discovery Rate <= fdr
         """
-        candidates = self.fdr.query(
-            "{} <= {}".format(AlleleSeqData.FdrColumns.FDR.value, fdr)
-        )["pval"]
+        count = numpy.searchsorted(self._sorted_fdr, fdr, side="right")
 
-        if candidates.empty:
+        if count == 0:
             print(
                 "Warning: sample {} has no data points with FDR <= {}".format(
                     self.name, fdr
@@ -101,36 +129,54 @@ class AlleleSeqData:
             )
             return 0
 
-        # Return the highest p value found with FDR < fdr
-        return candidates.max()
+        # Return the highest p value found with FDR <= fdr
+        return self._max_pval[count - 1]
 
     def get_candidates(self, fdr):
-        """Select all SNPs with a small enough P value to achieve an FDR <= fdr
-        and store them in self.candidates
+        """Select all SNPs with a small enough P value to achieve an FDR <= fdr.
+        The selection is remembered, so repeated calls with the same fdr are cheap.
         """
-
-        # pval is used in the query below, but pylint doesn't understand the @-reference.
-        pval = self.get_pval(fdr)  # pylint: disable=unused-variable
-
-        # Occasionally a row is marked as weird because there are
-        # reads that don't match the paternal or maternal allele.
-        candidates = self.count.query(
-            '({} <= @pval) and (winning != "?")'.format(
-                AlleleSeqData.CountColumns.P_VALUE.value
+        if fdr not in self._candidate_masks:
+            pval = self.get_pval(fdr)
+
+            # Occasionally a row is marked as weird because there are
+            # reads that don't match the paternal or maternal allele.
+            p_values = self.count[AlleleSeqData.CountColumns.P_VALUE.value].to_numpy()
+            winning = self.count[AlleleSeqData.CountColumns.WINNING_ALLELE.value]
+            self._candidate_masks[fdr] = (p_values <= pval) & (
+                winning.to_numpy() != "?"
             )
-        )
 
-        return candidates
+        return self.count[self._candidate_masks[fdr]]
 
     def get_row(self, chromosome, location):
-        """Fetch a SNP at ``chromsome``:``loc``"""
+        """Fetch a SNP at ``chromsome``:``loc`` as a dictionary of column values,
+        or None if there is no such SNP.
+
+        The lookup index is built from ``count`` on the first call, and rebuilt if
+        ``count`` is replaced. Changes made to ``count`` in place are not picked up.
+        """
+        if self._row_index is None or self._row_source is not self.count:
+            self.__index_rows()
+
         try:
-            return self.count.loc[chromosome, location]
+            row = self._row_index[chromosome, location]
         except KeyError:
             return None
         except TypeError:
             return None
 
+        return {column: values[row] for column, values in self._row_columns.items()}
+
+    def __index_rows(self):
+        """Map each (chromosome, position) to its row number, and keep the count
+        columns as plain arrays, so single SNP lookups avoid the cost of .loc"""
+        self._row_source = self.count
+        self._row_index = dict(zip(self.count.index, range(len(self.count))))
+        self._row_columns = {
+            column: self.count[column].to_numpy() for column in self.count.columns
+        }
+
     def get_het_snp(self, chromosome, location, reference_snp=None):
         """Look up a SNP and return the nucleotide of the preferentially bound allele"""
 
@@ -147,42 +193,56 @@ class AlleleSeqData:
 
     def get_winning_allele(self, chromosome, locations, pick_min=False):
         """Pool the results for all locations and return the overall preferentially bound allele"""
-        rows = list(
-            map(lambda location: self.get_row(chromosome, location.POS), locations)
-        )
+        positions = [location.POS for location in locations]
+        keys = pandas.MultiIndex.from_arrays([[chromosome] * len(positions), positions])
 
-        if any(elem is None for elem in rows):
+        # get_indexer only looks up the requested keys, rather than scanning the
+        # whole count index the way isin does.
+        indexer = self.count.index.get_indexer(keys)
+        if (indexer < 0).any():
             return None
 
-        maternal = 0
-        paternal = 0
-        for row in rows:
-            maternal_allele = "c{}".format(
-                row[AlleleSeqData.CountColumns.MATERNAL_ALLELE.value]
-            )
-            paternal_allele = "c{}".format(
-                row[AlleleSeqData.CountColumns.PATERNAL_ALLELE.value]
-            )
-            maternal += row[maternal_allele]
-            paternal += row[paternal_allele]
+        rows = self.count.iloc[indexer]
 
-        row_dataframe = pandas.DataFrame(rows)
+        maternal = AlleleSeqData.__sum_allele_counts(
+            rows, AlleleSeqData.CountColumns.MATERNAL_ALLELE.value
+        )
+        paternal = AlleleSeqData.__sum_allele_counts(
+            rows, AlleleSeqData.CountColumns.PATERNAL_ALLELE.value
+        )
 
         if (maternal > paternal) ^ pick_min:
-            return row_dataframe[
+            return rows[
                 [
                     AlleleSeqData.CountColumns.MATERNAL_ALLELE.value,
                     AlleleSeqData.CountColumns.REFERENCE_SNP.value,
                 ]
             ]
         else:
-            return row_dataframe[
+            return rows[
                 [
                     AlleleSeqData.CountColumns.PATERNAL_ALLELE.value,
                     AlleleSeqData.CountColumns.REFERENCE_SNP.value,
                 ]
             ]
 
+    @staticmethod
+    def __sum_allele_counts(rows, allele_column):
+        """Sum the read counts (cA/cC/cG/cT) of the allele given in ``allele_column``
+        over all rows"""
+        allele_index = pandas.Index(list(AlleleSeqData._nucleotides)).get_indexer(
+            rows[allele_column].astype(str)
+        )
+        if (allele_index < 0).any():
+            raise KeyError(
+                "Unexpected allele in {} column: {}".format(
+                    allele_column, set(rows[allele_column][allele_index < 0])
+                )
+            )
+
+        counts = rows[AlleleSeqData._count_columns].to_numpy()
+        return counts[numpy.arange(len(rows)), allele_index].sum()
+
     @classmethod
     def set_reference_genome(cls, genome):
         """Assign a reference genome to the class, for use in creating sequences"""
@@ -191,40 +251,67 @@ class AlleleSeqData:
     @classmethod
     def __create_sequences(cls, candidates):
         """Fetch sequences from the reference genome, modify them with the SNP as appropriate,
-        and return a dataframe with the sequences inserted
+        and return a dataframe with the sequences inserted. Candidates without a winning
+        allele get no sequence.
         """
-        sequences = []
-        for (chromosome, position), row in candidates.iterrows():
-            # Fetch the sequence from the reference genome
-            sequence = cls.__get_sequence_from_reference_genome(
-                chromosome, position, row
-            )
-            winning_snp = cls.__get_winning_snp(row)
-
-            if winning_snp:
-                # Mutate the sequence. Python strings are immutable so we create a copy
-                sequence = (
-                    sequence[: ReferenceGenome.offset]
-                    + winning_snp
-                    + sequence[ReferenceGenome.offset + 1 :]
+        chromosomes = candidates.index.get_level_values("chrm")
+        positions = candidates.index.get_level_values("snppos").to_numpy()
+
+        # Fetch the sequences from the reference genome, one batch per chromosome
+        sequences = [None] * len(candidates)
+        for chromosome in chromosomes.unique():
+            rows = numpy.flatnonzero(chromosomes == chromosome)
+            peaks = cls.genome.get_peaks(chromosome, positions[rows])
+            for row, peak in zip(rows, peaks):
+                sequences[row] = peak
+
+        # Check and mutate all the sequences at once as a single array of bytes.
+        # The SNP sits at the same place in each sequence as get_peak expects it.
+        lengths = numpy.array([len(sequence) for sequence in sequences], dtype=int)
+        starts = numpy.cumsum(lengths) - lengths
+        snp_offsets = numpy.minimum(ReferenceGenome.offset, positions - 1)
+        snp_index = starts + snp_offsets
+
+        # A SNP beyond the end of its contig gets a short sequence, and indexing the
+        # joined buffer would silently read the next sequence's bases instead.
+        outside = numpy.flatnonzero(snp_offsets >= lengths)
+        if outside.size:
+            raise IndexError(
+                "SNP at {} lies beyond the end of the reference sequence".format(
+                    candidates.index[outside[0]]
                 )
-                sequences.append(sequence)
-
-        return candidates.assign(sequence=sequences)
+            )
 
-    @classmethod
-    def __get_sequence_from_reference_genome(cls, chromosome, position, row):
-        """Fetch a sequence from the reference genome and confirm
-        it matches the expected value"""
+        bases = numpy.frombuffer("".join(sequences).encode(), dtype="S1").copy()
 
-        reference_base = row[cls.CountColumns.REFERENCE_SNP.value]
+        reference_bases = (
+            candidates[cls.CountColumns.REFERENCE_SNP.value].to_numpy().astype("S1")
+        )
+        mismatches = numpy.flatnonzero(bases[snp_index] != reference_bases)
+        assert (
+            not mismatches.size
+        ), "Reference genome doesn't match expectations at {}, expected {} found {}".format(
+            candidates.index[mismatches[0]],
+            reference_bases[mismatches[0]].decode(),
+            bases[snp_index[mismatches[0]]].decode(),
+        )
 
-        # Fetch the sequence from the reference genome
-        sequence = cls.genome.get_peak(
-            chromosome, position, expected_base=reference_base
+        winning = candidates[cls.CountColumns.WINNING_ALLELE.value].to_numpy()
+        has_winning_snp = (winning == "P") | (winning == "M")
+        winning_snps = numpy.where(
+            winning == "P",
+            candidates[cls.CountColumns.PATERNAL_ALLELE.value].to_numpy(),
+            candidates[cls.CountColumns.MATERNAL_ALLELE.value].to_numpy(),
         )
+        bases[snp_index[has_winning_snp]] = winning_snps[has_winning_snp].astype("S1")
 
-        return sequence
+        mutated = bases.tobytes().decode()
+        return candidates.assign(
+            sequence=[
+                mutated[start : start + length] if winning_snp else None
+                for start, length, winning_snp in zip(starts, lengths, has_winning_snp)
+            ]
+        )
 
     @staticmethod
     def __get_winning_snp(row):
@@ -1,7 +1,10 @@
 """Helper class containing the HG38 reference genome"""
 # Disable no-member error to work around https://github.com/pysam-developers/pysam/issues/819
 # pylint: disable=no-member
+import functools
 import os
+
+import numpy
 import pysam
 
 
@@ -10,6 +13,12 @@ class ReferenceGenome:
 
     offset = 100
 
+    # Regions are read from the fasta file in fixed size chunks, and the most recently
+    # used chunks are cached so that nearby peaks don't re-read (and for bgzipped files,
+    # re-decompress) the same part of the genome.
+    chunk_size = 131072
+    cached_chunks = 200
+
     def __init__(self, filename):
         """Load reference genome
 
@@ -24,6 +33,10 @@ class ReferenceGenome:
             print(samtools_error)
             exit(1)
 
+        self._fetch_chunk = functools.lru_cache(maxsize=self.cached_chunks)(
+            self._read_chunk
+        )
+
     def get_peak(self, reference, peak_position, expected_base=None):
         """Fetch a region of the genome centered on ``peak_position``, surrounded by
         an offset of base pairs on either side.
@@ -46,6 +59,44 @@ class ReferenceGenome:
 
         return sequence
 
+    def get_peaks(self, reference, peak_positions):
+        """Fetch the regions of the genome centered on each of ``peak_positions``, as
+        for ``get_peak``, on a single reference. Peaks are grouped by the cached chunk
+        of the genome they fall in, so that each chunk is looked up once.
+
+        Note that ``peak_positions`` are one-indexed
+
+        Returns a list of sequences in the same order as ``peak_positions``
+        """
+        peak_positions = numpy.asarray(peak_positions, dtype=numpy.int64)
+        starts = numpy.maximum(peak_positions - self.offset - 1, 0)
+        ends = numpy.maximum(peak_positions + self.offset, 2 * self.offset + 1)
+
+        first_chunks = starts // self.chunk_size
+        last_chunks = (ends - 1) // self.chunk_size
+
+        sequences = [None] * len(peak_positions)
+
+        # Peaks straddling a chunk boundary are rare, fetch those one by one.
+        for peak in numpy.flatnonzero(first_chunks != last_chunks):
+            sequences[peak] = self.get_region(reference, starts[peak], ends[peak])
+
+        within_chunk = numpy.flatnonzero(first_chunks == last_chunks)
+        within_chunk = within_chunk[
+            numpy.argsort(first_chunks[within_chunk], kind="stable")
+        ]
+        chunks, chunk_starts = numpy.unique(
+            first_chunks[within_chunk], return_index=True
+        )
+
+        for chunk, peaks in zip(chunks, numpy.split(within_chunk, chunk_starts[1:])):
+            sequence = self._fetch_chunk(reference, int(chunk))
+            offset = int(chunk) * self.chunk_size
+            for peak in peaks:
+                sequences[peak] = sequence[starts[peak] - offset : ends[peak] - offset]
+
+        return sequences
+
     @classmethod
     def get_peak_coords(cls, peak_position):
         """Get the start and end coordinates for a region centered on ``peak_position``,
@@ -70,4 +121,25 @@ class ReferenceGenome:
         end -- end position within region
         """
 
-        return self._genome.fetch(reference=reference, start=start, end=end).upper()
+        if start > end:
+            raise ValueError(
+                "invalid coordinates: start ({}) > end ({})".format(start, end)
+            )
+
+        first_chunk = start // self.chunk_size
+        last_chunk = (end - 1) // self.chunk_size
+
+        sequence = "".join(
+            self._fetch_chunk(reference, chunk)
+            for chunk in range(first_chunk, last_chunk + 1)
+        )
+
+        chunk_start = first_chunk * self.chunk_size
+        return sequence[start - chunk_start : end - chunk_start]
+
+    def _read_chunk(self, reference, chunk):
+        """Read the ``chunk``-th block of ``chunk_size`` bases of a region of the genome"""
+        start = chunk * self.chunk_size
+        return self._genome.fetch(
+            reference=reference, start=start, end=start + self.chunk_size
+        ).upper()
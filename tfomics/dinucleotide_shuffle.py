@@ -8,14 +8,16 @@ https://doi.org/10.1093/oxfordjournals.molbev.a040370
 Reworked and refactored to conform with pep8, as well as some performance tweaks
 """
 
-import random
-from collections import defaultdict
+import numpy as np
 
-# This can be reworked with a sequence object, which would be handy
-# when generating multiple strings from the same sequence, and would clean up some
-# passing around of parameters. We may have to deep copy the dinucleotide_sequence
-# parameter before shuffling, depending on whether we care about preserving the
-# original sequence.
+# The shuffle works on integer codes 0-3 for A, C, G and T rather than on strings,
+# these tables translate between the two.
+_ENCODE = bytes.maketrans(b"ACGT", bytes(range(4)))
+_DECODE = bytes.maketrans(bytes(range(4)), b"ACGT")
+
+# When generating multiple shuffles of the same section, validation and construction
+# of the dinucleotide graph are done once, and each shuffle works on its own copy of
+# the successor lists.
 
 
 def get_dinucleotide_sequence(section):
@@ -23,23 +25,21 @@ def get_dinucleotide_sequence(section):
     a section of DNA.
 
     Input parameters:
-    section - string of nucleoutides
+    section - array of nucleotide codes
 
     Returns:
     dinucleotide_sequence - what nucleotides Y followed immediately after nucleotide X?
                             i.e dinucleotide_sequence[X] = [Y1, Y2, Y3] if the pairs
                             X Y1, X Y2 and X Y3 occured in section
     """
-    # Construct a dictionary of lists to represent the vertices in the graph
-    dinucleotide_sequence = defaultdict(list)
-
-    # Compute count and lists
-    for i in range(len(section) - 1):
-        start = section[i]
-        end = section[i + 1]
-        dinucleotide_sequence[start].append(end)
+    starts = section[:-1]
+    ends = section[1:]
 
-    return dinucleotide_sequence
+    # A stable sort on the start of each pair groups the pairs by their first
+    # nucleotide in a single buffer, keeping them in order of occurrence.
+    order = np.argsort(starts, kind="stable")
+    boundaries = np.cumsum(np.bincount(starts, minlength=4))[:-1]
+    return np.split(ends[order], boundaries)
 
 
 def connected_to_last(edge_list, nucleotide_list, last_character):
@@ -48,29 +48,27 @@ def connected_to_last(edge_list, nucleotide_list, last_character):
 
     Inputs:
     edge_list - list of edges chosen
-    nucleotide_list - list of nucleotides that occur in the section
-    last_character - last character in the section
+    nucleotide_list - list of nucleotide codes that occur in the section
+    last_character - code of the last character in the section
 
     Returns:
     boolean: whether or not the edge list forms a fully connected graph, and that
     graph is connected to the last character.
     """
-    # Dictionary of whether a nucleotide is connected to the last character
-    connected = {}
-    for nucelotide in nucleotide_list:
-        connected[nucelotide] = False
-
-    # The last character is trivially connected to itself
-    connected[last_character] = True
-
-    # Back-propagate from the last nucleotide to all others
-    # The longest possible path in the graph is n-1
-    for _ in range(len(nucleotide_list) - 1):
+    # With only four nucleotide codes, the set of nucleotides connected to the last
+    # character fits in the bits of a single integer. The last character is
+    # trivially connected to itself.
+    connected = 1 << last_character
+
+    # Back-propagate from the last nucleotide until nothing changes
+    previous = 0
+    while connected != previous:
+        previous = connected
         for (start, end) in edge_list:
-            if connected[end]:
-                connected[start] = True
+            connected |= ((connected >> end) & 1) << start
 
-    return all(connected.values())
+    required = sum(1 << nucleotide for nucleotide in nucleotide_list)
+    return connected & required == required
 
 
 def pick_edges(section, nucleotide_list, dinucleotide_sequence, rng):
@@ -79,22 +77,29 @@ def pick_edges(section, nucleotide_list, dinucleotide_sequence, rng):
     character in the section.
 
     Parameters:
-    section - string of nucleotides to be shuffled
-    nucleotide_list - list of unique nucleotides appearing in section
-    dinucleotide_sequence - dictionary of lists of next-neigbhour nucleotide pairs
-    rng - instance of random.Random() to use when shuffling
+    section - array of nucleotide codes to be shuffled
+    nucleotide_list - list of unique nucleotide codes appearing in section
+    dinucleotide_sequence - list of arrays of next-neigbhour nucleotide pairs
+    rng - instance of numpy.random.Generator or random.Random to use when shuffling
 
     Returns:
     edge_list - list of chosen graph edges
     """
-    last_character = section[-1]
+    last_character = int(section[-1])
+    starts = [start for start in nucleotide_list if start != last_character]
+    lengths = [len(dinucleotide_sequence[start]) for start in starts]
 
     while True:
-        edge_list = []
-        for start in nucleotide_list:
-            if start != last_character:
-                end = rng.choice(dinucleotide_sequence[start])
-                edge_list.append((start, end))
+        # Draw the index of the chosen edge for every vertex at once
+        if isinstance(rng, np.random.Generator):
+            indices = rng.integers(lengths).tolist()
+        else:
+            indices = [rng.randrange(length) for length in lengths]
+
+        edge_list = [
+            (start, int(dinucleotide_sequence[start][index]))
+            for start, index in zip(starts, indices)
+        ]
 
         if connected_to_last(edge_list, nucleotide_list, last_character):
             break
@@ -114,18 +119,22 @@ def get_nucleotide_list(section):
     Throws:
     AssertionError if string contains letters other than A,C,G and T
     """
-    nucleotide_set = set(section)
-    invalid_nucleotides = nucleotide_set - {"A", "C", "G", "T"}
+    # Which bytes occur in the section, in a single pass
+    section_bytes = np.frombuffer(section.encode(), dtype=np.uint8)
+    present = np.bincount(section_bytes, minlength=256) > 0
+    nucleotides = np.frombuffer(b"ACGT", dtype=np.uint8)
+
     assert (
-        not invalid_nucleotides
-    ), "Input string contained non-nucleotide letters: {}".format(invalid_nucleotides)
+        present.sum() == present[nucleotides].sum()
+    ), "Input string contained non-nucleotide letters: {}".format(
+        set(section) - {"A", "C", "G", "T"}
+    )
 
-    # The order of the nucleotide set is non-deterministic, so sort it
-    # to ensure reproducibility
-    return sorted(list(nucleotide_set))
+    # Keep the nucleotides in a fixed order to ensure reproducibility
+    return [chr(nucleotide) for nucleotide in nucleotides if present[nucleotide]]
 
 
-def dinucleotide_shuffle(section, rng=None):
+def dinucleotide_shuffle(section, rng=None, n=None):
     """Construct a new random eulerian path throught he nucleotide string by
     - Counting all the edges in the nucleotide connection graph
     - Randomly picking an edge emerging from each vertex in the graph except for
@@ -139,38 +148,78 @@ def dinucleotide_shuffle(section, rng=None):
 
     Inputs:
     - section - string of nucleotides to be shuffled
-    - rng - optional: instance of random.Random to be used for shuffling
+    - rng - optional: instance of numpy.random.Generator or random.Random to be used
+      for shuffling
+    - n - optional: number of shuffles to generate. The graph is only built once
+      and shared between all n shuffles.
     Outputs:
-    shuffled string of nucleotides
+    shuffled string of nucleotides, or a list of n shuffled strings if n is given
     """
 
-    if not rng:
-        rng = random.Random()
+    if rng is None:
+        rng = np.random.default_rng()
 
     # Convert to uppercase before continuing
     section = section.upper()
-    nucleotide_list = get_nucleotide_list(section)
+    nucleotide_list = [
+        "ACGT".index(nucleotide) for nucleotide in get_nucleotide_list(section)
+    ]
+    section = np.frombuffer(section.encode().translate(_ENCODE), dtype=np.uint8)
 
-    # dinucleotide sequence: { "A": ["A", "C", "A", "T",...], "T": [...]}
+    # dinucleotide sequence: [array([0, 1, 0, 3,...]), array([...]), ...]
     dinucleotide_sequence = get_dinucleotide_sequence(section)
+
+    if n is None:
+        return _shuffle(section, nucleotide_list, dinucleotide_sequence, rng)
+
+    return [
+        _shuffle(section, nucleotide_list, dinucleotide_sequence, rng) for _ in range(n)
+    ]
+
+
+def _shuffle(section, nucleotide_list, dinucleotide_sequence, rng):
+    """Generate a single shuffle of section from its dinucleotide graph.
+    dinucleotide_sequence is left untouched, the shuffle works on a copy.
+    """
     edge_list = pick_edges(section, nucleotide_list, dinucleotide_sequence, rng)
+    last_edges = dict(edge_list)
+
+    # Work on a single copy of the edges, with the edges leaving each vertex
+    # starting at its offset
+    successors = np.concatenate(dinucleotide_sequence)
+    offsets = np.cumsum([0] + [len(ends) for ends in dinucleotide_sequence[:-1]])
 
     # move the edges in edge_list to the end of the vertex list, shuffle all other edges.
-    for (start, end) in edge_list:
-        dinucleotide_sequence[start].remove(end)
-    for nucleotide in nucleotide_list:
-        rng.shuffle(dinucleotide_sequence[nucleotide])
-    for (start, end) in edge_list:
-        dinucleotide_sequence[start].append(end)
+    for start, ends in enumerate(np.split(successors, offsets[1:])):
+        if start in last_edges:
+            # Swap one copy of the chosen edge into the last place, and only
+            # shuffle the edges in front of it.
+            index = np.flatnonzero(ends == last_edges[start])[0]
+            ends[index], ends[-1] = ends[-1], ends[index]
+            ends = ends[:-1]
+        rng.shuffle(ends)
 
     # construct the eulerian path
-    path = section[0]
-    previous_character = section[0]
+    path = bytearray(len(section))
+    _traverse(path, successors.tolist(), offsets.tolist(), section[0])
 
-    for _ in range(len(section) - 1):
-        current_character = dinucleotide_sequence[previous_character][0]
-        path += current_character
-        del dinucleotide_sequence[previous_character][0]
-        previous_character = current_character
+    return path.translate(_DECODE).decode()
 
-    return path
+
+def _traverse(path, successors, offsets, start):
+    """Walk the graph from the nucleotide start, filling path with the nucleotide
+    codes visited. successors holds the edges leaving each vertex back to back in
+    the order they are to be followed, with those of vertex i starting at offsets[i].
+
+    successors and offsets are plain lists and path a bytearray, since indexing
+    those is several times faster than indexing numpy arrays from python.
+    """
+    # Position in successors of the next unused edge leaving each vertex
+    heads = list(offsets)
+    previous_character = path[0] = int(start)
+
+    for position in range(1, len(path)):
+        current_character = successors[heads[previous_character]]
+        heads[previous_character] += 1
+        path[position] = current_character
+        previous_character = current_character
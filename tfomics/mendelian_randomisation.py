@@ -3,12 +3,11 @@ Intended use:
 - Filter your GWAS results using filter_effect_snps
 - Calculate naive_effect_on_trait using your list of binding variants and 
 """
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 import numpy as np
 import pandas as pd
-from scipy.stats import norm
-from statsmodels.sandbox.stats.multicomp import multipletests
+from scipy.special import ndtr
 
 
 def filter_effect_snps(
@@ -33,14 +32,17 @@ def filter_effect_snps(
     """
     # FIXME: what's HWE and iscore?
 
-    query = f"""(MAF >= {min_MAF} ) and \
-                (HWE >= {min_HWE}) and \
-                (iscore >= {min_iscore})"""
+    keep = (
+        effect.notna().all(axis=1).to_numpy()
+        & (effect["MAF"].to_numpy() >= min_MAF)
+        & (effect["HWE"].to_numpy() >= min_HWE)
+        & (effect["iscore"].to_numpy() >= min_iscore)
+    )
 
     if trait_list is not None:
-        query += f" and (trait in {trait_list})"
+        keep &= effect["trait"].isin(set(trait_list)).to_numpy()
 
-    return effect.dropna(axis=0, how="any").query(query)
+    return effect[keep]
 
 
 def _calculate_causal_effect(
@@ -57,38 +59,76 @@ def _calculate_causal_effect(
     return causal_effect, standard_error
 
 
-def _fit_effects(row: pd.Series) -> pd.Series:
-    return_index = [
-        "MR total causal effect",
-        "MR se",
-        "z score",
-        "p value",
-        "effect_allele",
-    ]
+def _fit_effects(candidates: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Calculate the causal effect for every exposure/GWAS pair in candidates at once,
+    returning a dictionary of output columns.
 
+    The exposure effect is oriented to match the GWAS effect allele. Rows where the
+    GWAS allele matches neither the reference nor the alternate allele are all NaN.
+    """
     # Determine the effect allele, and orient the effect accordingly.
-    if row.allele == row.alt:
-        allele_swap_sign = 1
-        effect_allele = "alt"
-    elif row.allele == row.ref:
-        allele_swap_sign = -1
-        effect_allele = "ref"
-    else:
-        return pd.Series(np.full(len(return_index), np.nan), index=return_index)
+    # The alleles are encoded as integers with a shared coding, so that matching them
+    # compares integer codes instead of strings. Missing alleles are coded as -1.
+    allele_codes, _ = pd.factorize(
+        np.concatenate(
+            [
+                candidates.allele.to_numpy(),
+                candidates.alt.to_numpy(),
+                candidates.ref.to_numpy(),
+            ]
+        )
+    )
+    allele_code, alt_code, ref_code = allele_codes.reshape(3, len(candidates))
+    is_alt = (allele_code == alt_code) & (allele_code >= 0)
+    is_ref = (allele_code == ref_code) & (allele_code >= 0) & ~is_alt
+
+    allele_swap_sign = np.full(len(candidates), np.nan)
+    allele_swap_sign[is_alt] = 1
+    allele_swap_sign[is_ref] = -1
+
+    effect_allele = np.full(len(candidates), np.nan, dtype=object)
+    effect_allele[is_alt] = "alt"
+    effect_allele[is_ref] = "ref"
 
     causal_es, causal_se = _calculate_causal_effect(
-        allele_swap_sign * row.es,
-        row.es_sterr,
-        row.beta,
-        row.NSE,
+        allele_swap_sign * candidates.es.to_numpy(dtype=np.float64),
+        candidates.es_sterr.to_numpy(dtype=np.float64),
+        candidates.beta.to_numpy(dtype=np.float64),
+        candidates.NSE.to_numpy(dtype=np.float64),
     )
     # Calculate the z-score and associated p-value
     z = causal_es / causal_se
-    p = norm.sf(abs(z)) * 2.0
+    p = ndtr(-np.abs(z)) * 2.0
 
-    return pd.Series(
-        data=[causal_es, causal_se, z, p, effect_allele], index=return_index
-    )
+    return {
+        "MR total causal effect": causal_es,
+        "MR se": causal_se,
+        "z score": z,
+        "p value": p,
+        "effect_allele": effect_allele,
+    }
+
+
+def _benjamini_hochberg(p_values: np.ndarray) -> np.ndarray:
+    """Calculate Benjamini-Hochberg q-values for an array of p-values.
+    NaN p-values are left out of the correction and get a NaN q-value.
+    """
+    p_values = np.asarray(p_values, dtype=np.float64)
+    tested = ~np.isnan(p_values)
+    tested_p_values = p_values[tested]
+    count = tested_p_values.size
+
+    order = np.argsort(tested_p_values)
+    ranked = tested_p_values[order] / (np.arange(1, count + 1) / count)
+
+    # Each q-value is the smallest ranked value at or above its rank
+    tested_q_values = np.empty(count)
+    tested_q_values[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1.0)
+
+    q_values = np.full(p_values.shape, np.nan)
+    q_values[tested] = tested_q_values
+    return q_values
 
 
 def naive_effect_on_trait(
@@ -102,6 +142,8 @@ def naive_effect_on_trait(
     q-values for each SNP based on the distribution of p-values in the analysis.
 
     If permute is set, the analysis is treated as a permutation test, and the effect SNPs are randomly reshuffled.
+    The effect dataframe passed in is left untouched, so for repeated permutations filter the GWAS results once
+    with filter_effect_snps and pass the same filtered dataframe to every call.
 
     Inputs:
     - exposure: dataframe of variants used as exposure variables for the MR analysis, along with their effect on
@@ -113,13 +155,23 @@ def naive_effect_on_trait(
     """
 
     if permute:
-        effect[["rsid"]] = np.random.permutation(effect[["rsid"]])
+        effect = effect.assign(rsid=np.random.permutation(effect["rsid"].to_numpy()))
+
+    # GWAS tables are typically much larger than the set of exposure variants, so
+    # cut them down to the exposure rsids before joining on an rsid index.
+    effect = effect[effect["rsid"].isin(exposure["rsid"])].set_index("rsid")
+    candidates = exposure.join(
+        effect, on="rsid", how="left", lsuffix="_x", rsuffix="_y"
+    ).reset_index(drop=True)
 
-    candidates = exposure.merge(effect, on="rsid", how="left")
+    # candidates is a fresh frame from the join, so add the results to it directly
+    # rather than joining a second frame onto it.
+    for column, values in _fit_effects(candidates).items():
+        candidates[column] = values
 
-    out = candidates.join(candidates.apply(_fit_effects, axis=1)).dropna()
+    candidates.dropna(inplace=True)
 
     # Multiple testing correction with the Benjamini-Hochberg method
-    out["q values"] = multipletests(out["p value"], method="fdr_bh")[1]
+    candidates["q values"] = _benjamini_hochberg(candidates["p value"])
 
-    return out
+    return candidates
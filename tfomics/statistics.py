@@ -2,20 +2,20 @@
 potential allele-specific binding sites.
 """
 
+import numpy as np
 import pandas as pd
-from scipy.optimize import curve_fit
 
 
 def calculate_effect_size(data_frame, param_column="ar", sterr_column="ar_sterr"):
     """Calculate the ASB effect size by translating and rescaling the estimated allelic ratio
     and associated standard deviations.
     """
-    return data_frame.apply(
-        lambda row: pd.Series(
-            (1 - 2.0 * row[param_column], 2 * row[sterr_column]),
-            index=["es", "es_sterr"],
-        ),
-        axis=1,
+    return pd.DataFrame(
+        {
+            "es": 1 - 2.0 * data_frame[param_column].to_numpy(dtype=np.float64),
+            "es_sterr": 2 * data_frame[sterr_column].to_numpy(dtype=np.float64),
+        },
+        index=data_frame.index,
     )
 
 
@@ -29,14 +29,13 @@ def estimate_binomial_probability(
     ar - allelic ratio
     ar_sterr - standard deviation for the allelic ratio
     """
-    return data_frame.apply(
-        lambda row: pd.Series(
-            _binomial_probability_and_variance(
-                row[positives_column], row[negatives_column]
-            ),
-            index=["ar", "ar_sterr"],
-        ),
-        axis=1,
+    p_estimate, var_estimate = _binomial_probability_and_variance(
+        data_frame[positives_column].to_numpy(dtype=np.float64),
+        data_frame[negatives_column].to_numpy(dtype=np.float64),
+    )
+
+    return pd.DataFrame(
+        {"ar": p_estimate, "ar_sterr": var_estimate}, index=data_frame.index
     )
 
 
@@ -44,43 +43,25 @@ def _binomial_probability_and_variance(positives, negatives):
     """Return an estimate for the probability and
     variance of a single binomial experiment with the number of
     positive and negative outcomes as given.
+
+    Works on scalars as well as on arrays of experiments.
     """
     # Require a minimum of 1 for both positive and negative outcomes.
     # This is equivalent to setting a bound on your estimator for
     # p by assuming that if you ran one more trial it would come up
     # with the opposite outcome.
 
-    positives = max(positives, 1)
-    negatives = max(negatives, 1)
+    positives = np.maximum(positives, 1)
+    negatives = np.maximum(negatives, 1)
 
     total = positives + negatives
 
     p_estimate = positives / total
-    var_estimate = (p_estimate * (1.0 - p_estimate) / total) ** 0.5
+    var_estimate = np.sqrt(p_estimate * (1.0 - p_estimate) / total)
 
     return p_estimate, var_estimate
 
 
-def _pool_summary_statistics(points, sterr):
-    """Pool summary statistics from multiple samples by performing
-    a weighted least-squares fit of a constant to the data points.
-
-    points - points to be averaged
-    sterr - list of standard deviations for each point
-
-    Returns a tuple with the pooled average of the input points, and
-    the estimated standard deviation of the pooled average.
-    """
-    if len(points) == 1:
-        return (points.iat[0], sterr.iat[0])
-
-    params, cov = curve_fit(
-        lambda x, a: a, range(len(points)), points, sigma=sterr, absolute_sigma=True
-    )
-
-    return (params[0], cov[0][0] ** 0.5)
-
-
 def group_statistics(
     data_frame,
     param_column="ar",
@@ -96,28 +77,61 @@ def group_statistics(
 
     Returns a new data frame indexed by `group_columns` with the pooled statistics.
     """
-    return data_frame.groupby(list(group_columns)).apply(
-        lambda group: pd.Series(
-            _pool_summary_statistics(group[param_column], group[sterr_column]),
-            index=[param_column, sterr_column],
+    # Pooling is a weighted least-squares fit of a constant to each group, which
+    # is the inverse-variance weighted mean with variance 1 / sum(1 / sterr^2).
+    # Both only need per-group sums of the weights and weighted points.
+    group_columns = list(group_columns)
+    weights = 1.0 / data_frame[sterr_column].to_numpy(dtype=np.float64) ** 2
+    sums = (
+        data_frame[group_columns]
+        .assign(
+            _weight=weights,
+            _weighted_param=weights
+            * data_frame[param_column].to_numpy(dtype=np.float64),
         )
+        # Only keep groups present in the data, rather than every combination of
+        # categories when grouping on categorical columns. pandas doesn't always
+        # sort observed categorical groups, so sort the (small) result explicitly.
+        .groupby(group_columns, observed=True, sort=True)[
+            ["_weight", "_weighted_param"]
+        ]
+        .sum()
+        .sort_index()
+    )
+
+    return pd.DataFrame(
+        {
+            param_column: sums["_weighted_param"] / sums["_weight"],
+            sterr_column: 1.0 / np.sqrt(sums["_weight"]),
+        },
+        index=sums.index,
     )
 
 
-def get_ref_and_alt_counts(row):
+def get_ref_and_alt_counts(data_frame):
     """Get the read counts for the reference and alternate allele from
     an allele-seq dataframe.
     """
-    ref = row["ref"]
+    nucleotides = ["A", "C", "G", "T"]
+    counts = data_frame[[f"c{nucleotide}" for nucleotide in nucleotides]].to_numpy()
+
+    ref, mat_all, pat_all = (
+        pd.Categorical(data_frame[column], categories=nucleotides).codes
+        for column in ("ref", "mat_all", "pat_all")
+    )
 
     # This won't quite work if neither the maternal or paternal
     # alleles are the reference allele, though this is rare.
-    if row["mat_all"] == row["ref"]:
-        alt = row["pat_all"]
-    else:
-        alt = row["mat_all"]
+    alt = np.where(mat_all == ref, pat_all, mat_all)
 
-    return pd.Series((row[f"c{ref}"], row[f"c{alt}"]), index=["ref_count", "alt_count"])
+    if (ref < 0).any() or (alt < 0).any():
+        raise KeyError("alleles must be one of {}".format(nucleotides))
+
+    rows = np.arange(len(data_frame))
+    return pd.DataFrame(
+        {"ref_count": counts[rows, ref], "alt_count": counts[rows, alt]},
+        index=data_frame.index,
+    )
 
 
 def allele_seq_effect_size(data_frame):
@@ -147,11 +161,13 @@ def allele_seq_effect_size(data_frame):
     if missing_cols:
         raise KeyError("data frame missing columns: {}".format(missing_cols))
 
-    # Compute reference and alternate counts
+    # Compute reference and alternate counts, and estimate the allelic ratio at each
+    # SNP in each sample. The result is a new frame on the same index, so the group
+    # columns are added to it directly rather than joined.
+    probabilities = estimate_binomial_probability(get_ref_and_alt_counts(data_frame))
+    for column in ("chrm", "snppos"):
+        probabilities[column] = data_frame[column].array
 
-    probabilities = data_frame.apply(get_ref_and_alt_counts, axis=1).pipe(
-        estimate_binomial_probability
+    return calculate_effect_size(
+        group_statistics(probabilities, group_columns=("chrm", "snppos"))
     )
-    return group_statistics(
-        data_frame.join(probabilities), group_columns=("chrm", "snppos")
-    ).pipe(calculate_effect_size)